@@ -22,11 +22,15 @@ def main():
     def rednotebook_to_markdown(date):
         """Returns the given date's RedNotebook entry in Markdown format."""
         rn_lines = rednotebook[date].split('\n') if date in rednotebook else []
-        formatter = formatters.format_rednotebook_as_markdown()
-        md_lines = [formatter.send(line.rstrip()) for line in rn_lines]
-        return '\n'.join(md_lines)
-
-    print(ENTRY_SEP.join(rednotebook_to_markdown(d) for d in date_range))
+        return formatters.format_document(
+            '\n'.join(line.rstrip() for line in rn_lines))
+
+    # Entries are written as they are formatted rather than joined up front.
+    for i, date in enumerate(date_range):
+        if i:
+            sys.stdout.write(ENTRY_SEP)
+        sys.stdout.write(rednotebook_to_markdown(date))
+    sys.stdout.write('\n')
 
 
 if __name__ == '__main__':
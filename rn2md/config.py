@@ -1,5 +1,4 @@
 """Builds configuration options for rn2md tool with nice default behavior."""
-import configparser
 import os
 
 from . import util
@@ -14,6 +13,10 @@ class Options():
         'workday mode': 'off',
         'default date range': 'today',
     }
+    BOOLEAN_STATES = {
+        '1': True, 'yes': True, 'true': True, 'on': True,
+        '0': False, 'no': False, 'false': False, 'off': False,
+    }
 
     @classmethod
     def from_argv(cls, argv):
@@ -21,23 +24,76 @@ class Options():
         return cls(), argv[1:]
 
     def __init__(self, section='DEFAULT'):
-        self._config = configparser.ConfigParser(self.DEFAULT_CONFIG_VALUES)
-        self._config.read(os.path.expanduser('~/.rn2mdrc'))
-        self._section = section
+        config = _read_config(os.path.expanduser('~/.rn2mdrc'),
+                              section, self.DEFAULT_CONFIG_VALUES)
+        workday_mode = config['workday mode']
+        try:
+            self._workdays_only = self.BOOLEAN_STATES[workday_mode.lower()]
+        except KeyError:
+            raise ValueError(f'{workday_mode!r} is not a boolean') from None
+        self._data_path = config['data path']
         self._default_date_range = util.parse_date_range(
-            self._config[section].get('default date range'))
+            config['default date range'])
 
     @property
     def workdays_only(self):
         """Read-only accessor for workday mode."""
-        return self._config[self._section].getboolean('workday mode')
+        return self._workdays_only
 
     @property
     def data_path(self):
         """Read-only accessor for data path."""
-        return self._config[self._section].get('data path')
+        return self._data_path
 
     @property
     def default_date_range(self):
         """Read-only accessor for default date range."""
         return self._default_date_range
+
+
+def _read_config(path, section, defaults):
+    """Returns the values of an INI-style config file's section.
+
+    Args:
+        path: location of the config file. A file which cannot be opened is
+            treated as empty.
+        section: name of the section to read. Values in the DEFAULT section
+            apply to every section unless the section overrides them.
+        defaults: values to use for keys which are not in the file at all.
+
+    Returns:
+        dict mapping lower-cased keys to their string values.
+
+    Raises:
+        KeyError: the file has no section with the given name.
+        ValueError: the file has a line which is neither a section header nor
+            a key=value pair, or has a key before its first section header.
+            Values spanning multiple lines are not supported.
+    """
+    try:
+        with open(path, encoding='utf-8') as config_file:
+            lines = config_file.read().split('\n')
+    except OSError:
+        lines = []
+    sections = {}
+    values = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line[0] == '[' and line[-1] == ']':
+            values = sections.setdefault(line[1:-1].strip(), {})
+            continue
+        # Keys are separated from their value by the first '=' or ':'.
+        sep = min((i for i in (line.find('='), line.find(':')) if i != -1),
+                  default=-1)
+        if sep == -1:
+            raise ValueError(f'{path!r} has {line!r} which is not a key=value')
+        if values is None:
+            raise ValueError(f'{path!r} has {line!r} before any section header')
+        values[line[:sep].strip().lower()] = line[sep + 1:].strip()
+    if section == 'DEFAULT':
+        sections.setdefault(section, {})
+    elif section not in sections:
+        raise KeyError(section)
+    return {**defaults, **sections.get('DEFAULT', {}), **sections[section]}
@@ -13,100 +13,168 @@ Here is a summary of the currently implemented formatters:
     - Unordered item                  - Unordered item
     ``asdf``                          `asdf`
 """
+import bisect
 import re
+from typing import (
+    Callable, Dict, Iterable, Iterator, List, Match, Pattern, Sequence, Tuple)
 
-import defaultlist
-
-from . import util
-
-
-@util.prime_coroutine_generator
-def format_rednotebook_as_markdown(header_padding=0):
-    """Sequences all other formatters to create markdown-formatted lines."""
-    ordered_formatters = [
-        format_inner_underscores(),
-        format_links(),
-        format_images(),
-        format_headers(padding=header_padding),
-        format_code_blocks(),
-        format_italic_text(),
-        format_strikethrough_text(),
-        format_lists(),
-    ]
-    line = ''
-    while True:
-        line = yield line
-        for formatter in ordered_formatters:
-            line = formatter.send(line)
-
-
-@util.prime_coroutine_generator
-def format_links():
+_Span = Tuple[int, int]
+_SpanGetter = Callable[[str], List[_Span]]
+_SpanTest = Callable[[_Span], bool]
+
+_LINK_RE = re.compile(r'\[([^\]\n]*?) ""(.*?)""\]')
+_IMG_RE = re.compile(r'\[""(.*?)""\]')
+_HEADER_LINE_RE = re.compile(r'^(=+)(?=[^=\n])(.*[^=\n])\1$', re.MULTILINE)
+_LIST_RE = re.compile(r'^\s*([-|\+])\s')
+_INNER_US_RE = re.compile(r'(?<=\w)_(?=\w)')
+# Links and back-ticked sections, whose contents are left alone by formatters.
+_BACKTICK_RE = re.compile(r'`[^`\n]*`')
+_EXCLUDED_RE = re.compile(
+    r'(?P<link>\[(?P<text>[^\]\n]*?) ""(?P<url>.*?)""\])|' +
+    _BACKTICK_RE.pattern)
+_PAIRED_DELIM_RE = re.compile(r'``|//|--')
+
+# Substitutions for the delimiters found by _PAIRED_DELIM_RE, in the order the
+# standalone formatters were originally applied.
+_PAIRED_DELIM_SUBS = {'``': '`', '//': '_', '--': '~'}
+
+# Markdown header markers indexed by depth, covering every reasonable header.
+_HEADER_MARKERS = tuple('#' * depth for depth in range(16))
+
+
+def format_document(text: str, header_padding: int = 0) -> str:
+    """Transforms an entire RedNotebook-formatted entry into markdown-syntax.
+
+    Links, images and headers are substituted over the whole text at once, so
+    only the remaining formatters need to be applied line by line.
+
+    Args:
+        text: RedNotebook-formatted text, with lines separated by newlines.
+        header_padding: extra levels to add to every header.
+
+    Returns:
+        the text in markdown syntax.
+    """
+    text = '\n'.join(
+        format_inner_underscores(line) for line in text.split('\n'))
+    if '""' in text:
+        text = _LINK_RE.sub(r'[\1](\2)', text)
+        text = _IMG_RE.sub(r'![](\1)', text)
+    if '=' in text:
+        text = _HEADER_LINE_RE.sub(
+            lambda m: _format_header(
+                m.group(2), len(m.group(1)), header_padding),
+            text)
+    list_formatter = ListFormatter()
+    return '\n'.join(
+        list_formatter.format(_sub_paired_delims(line))
+        for line in text.split('\n'))
+
+
+def format_stream(
+        lines: Iterable[str], header_padding: int = 0) -> Iterator[str]:
+    """Lazily transforms RedNotebook-formatted lines into markdown-syntax.
+
+    Args:
+        lines: iterable of RedNotebook-formatted lines, e.g. an open file.
+        header_padding: extra levels to add to every header.
+
+    Yields:
+        each line in markdown syntax, keeping its trailing newline if it had
+        one.
+    """
+    list_formatter = ListFormatter()
+    for line in lines:
+        content = line.rstrip('\n')
+        yield format_rednotebook_as_markdown(
+            content, list_formatter, header_padding=header_padding
+        ) + line[len(content):]
+
+
+def format_rednotebook_as_markdown(
+        line: str, list_formatter: 'ListFormatter',
+        header_padding: int = 0) -> str:
+    """Sequences all other formatters to create a markdown-formatted line.
+
+    Args:
+        line: RedNotebook-formatted line to transform.
+        list_formatter: ListFormatter carrying list numbering between lines.
+        header_padding: extra levels to add to every header.
+
+    Returns:
+        the line in markdown syntax.
+    """
+    line = format_inner_underscores(line)
+    line = format_links(line)
+    line = format_images(line)
+    line = format_headers(line, padding=header_padding)
+    # Code blocks, italics and strikethroughs share a single fused pass.
+    line = _sub_paired_delims(line)
+    return list_formatter.format(line)
+
+
+def format_links(line: str) -> str:
     """Transforms '[[text ""url""]]' to '[text](url)'."""
-    line = ''
-    while True:
-        line = yield re.sub(r'\[([^\]]*?) ""(.*?)""\]', r'[\1](\2)', line)
+    if '""' not in line:
+        return line
+    return _LINK_RE.sub(r'[\1](\2)', line)
 
 
-@util.prime_coroutine_generator
-def format_images():
+def format_images(line: str) -> str:
     """Transforms '[[""image url""]]' to '![](image url)'."""
-    line = ''
-    while True:
-        line = yield re.sub(r'\[""(.*?)""\]', r'![](\1)', line)
+    if '""' not in line:
+        return line
+    return _IMG_RE.sub(r'![](\1)', line)
 
 
-@util.prime_coroutine_generator
-def format_italic_text():
+def format_italic_text(line: str) -> str:
     """Transforms '//text//' to '_text_'."""
-    line = ''
-    while True:
-        line = yield _sub_balanced_delims('//', '_', line)
+    return _sub_paired_delims(line, delims=('//',))
 
 
-@util.prime_coroutine_generator
-def format_strikethrough_text():
+def format_strikethrough_text(line: str) -> str:
     """Transforms '--text--' to '**OBSOLETE**(text)'."""
-    line = ''
-    while True:
-        line = yield line
-        if line != ('-' * len(line)):
-            line = _sub_balanced_delims('--', '~', line)
+    return _sub_paired_delims(line, delims=('--',))
 
 
-@util.prime_coroutine_generator
-def format_code_blocks():
+def format_code_blocks(line: str) -> str:
     """Transforms codeblocks into markdown-syntax."""
-    line = ''
-    while True:
-        line = yield _sub_balanced_delims('``', '`', line, preds=[_not_in_link])
+    return _sub_paired_delims(line, delims=('``',))
 
 
-@util.prime_coroutine_generator
-def format_headers(padding=0):
+def format_headers(line: str, padding: int = 0) -> str:
     """Transforms '=TEXT=' into '# TEXT'."""
-    line = ''
-    while True:
-        line = yield line
-        start_delim = re.search(r'^=+', line)
-        if not start_delim or start_delim.group() == line:
-            continue
-        end_delim = re.search(r'=+$', line)
-        if not end_delim or end_delim.group() != start_delim.group():
-            continue
-        level = len(start_delim.group())
-        line = f'{"#" * (padding + level)} {line[level:-level].lstrip()}'
-
-
-@util.prime_coroutine_generator
-def format_lists():
-    """Transforms ordered and unordered lists into markdown-syntax."""
-    ordered_list_history = defaultlist.defaultlist(lambda: 1)
-    sequential_empty_lines = 0
-    line = ''
-    while True:
-        line = yield line
-        list_item_match = re.match(r'^\s*([-|\+])\s', line)
+    if not line.startswith('='):
+        return line
+    level = len(line) - len(line.lstrip('='))
+    if level == len(line) or len(line) - len(line.rstrip('=')) != level:
+        return line
+    return _format_header(line[level:-level], level, padding)
+
+
+def _format_header(text: str, level: int, padding: int) -> str:
+    """Returns the markdown header for text found between level delimiters."""
+    depth = padding + level
+    if depth < len(_HEADER_MARKERS):
+        return f'{_HEADER_MARKERS[depth]} {text.lstrip()}'
+    return f'{"#" * depth} {text.lstrip()}'
+
+
+class ListFormatter():
+    """Transforms ordered and unordered lists into markdown-syntax.
+
+    Ordered list numbering carries over from one line to the next, so a single
+    instance should be used for all of the lines of an entry.
+    """
+
+    def __init__(self) -> None:
+        # Maps the column of each ordered list marker to its next number.
+        self._ordered_list_history: Dict[int, int] = {}
+        self._sequential_empty_lines = 0
+
+    def format(self, line: str) -> str:
+        """Returns the line with its list item marker in markdown-syntax."""
+        list_item_match = _LIST_RE.match(line)
         if list_item_match:
             i = list_item_match.start(1)
             if line[i] == '-':
@@ -114,83 +182,160 @@ def format_lists():
                 pass
             else:
                 # Ordered lists must change to the actual number.
-                line = f'{line[:i]}{ordered_list_history[i]}.{line[i + 1:]}'
-                ordered_list_history[i] += 1
+                number = self._ordered_list_history.get(i, 1)
+                line = f'{line[:i]}{number}.{line[i + 1:]}'
+                self._ordered_list_history[i] = number + 1
             # Reset numbering of sub-items.
-            del ordered_list_history[i + 1:]
+            for column in [c for c in self._ordered_list_history if c > i]:
+                del self._ordered_list_history[column]
         elif line.strip():
-            sequential_empty_lines = 0
-            ordered_list_history.clear()
+            self._sequential_empty_lines = 0
+            self._ordered_list_history.clear()
         else:
-            sequential_empty_lines += 1
-            if sequential_empty_lines >= 2:
-                ordered_list_history.clear()
+            self._sequential_empty_lines += 1
+            if self._sequential_empty_lines >= 2:
+                self._ordered_list_history.clear()
+        return line
 
 
-@util.prime_coroutine_generator
-def format_inner_underscores():
+def format_inner_underscores(line: str) -> str:
     """Transforms underscores which need to be escaped."""
-    line = ''
-    while True:
-        line = yield line
-        inner_underscores = list(_filter_matches(r'(?<=\w)_(?=\w)', line))
-        for match in reversed(inner_underscores):
-            line = f'{line[:match.start()]}\\_{line[match.end():]}'
+    if '_' not in line:
+        return line
+    if '[' not in line and '`' not in line:
+        # Without links or backticks nothing is excluded, so every match can be
+        # substituted directly.
+        return _INNER_US_RE.sub(r'\\_', line)
+    return _join_subs(line, [
+        (match.span(), '\\_')
+        for match in _filter_matches(_INNER_US_RE, line)])
+
 
+def _sub_paired_delims(
+        line: str, delims: Sequence[str] = tuple(_PAIRED_DELIM_SUBS)) -> str:
+    """Finds paired delimiters and replaces them with their substitutions.
 
-def _sub_balanced_delims(delim_pattern, sub, string, **kwargs):
-    """Finds paired delimiters and replaces them with a substitution.
+    Every delimiter is located by a single scan of the line, after which the
+    balanced ones are substituted while the output is joined in one pass.
 
     Example:
-        >>> _sub_balanced_delims('_', '*', '^_test_$')
-        ... '^*test*$'
+        >>> _sub_paired_delims('//a// and --b--')
+        ... '_a_ and ~b~'
 
     Args:
-        delim_pattern: regex for the delimiter to replace.
-        sub: delimiter to use instead. Can either be a string or a 2-tuple.
-        string: string to have delimiters replaced.
-        **kwargs: downstream arguments for _filter_matches.
+        line: string to have delimiters replaced.
+        delims: which keys of _PAIRED_DELIM_SUBS should be substituted.
 
     Returns:
         new string where all targeted balanced delimiters are substituted.
     """
-    try:
-        start_sub, end_sub = sub
-    except ValueError:
-        start_sub = end_sub = sub
-    delims = _filter_matches(delim_pattern, string, **kwargs)
-    balanced_delims = list(zip(delims, delims))
-    # Do substitutions in reverse so the match indices stay valid.
-    for start_delim, end_delim in reversed(balanced_delims):
-        start = string[:start_delim.start()]
-        data = string[start_delim.end():end_delim.start()]
-        end = string[end_delim.end():]
-        string = f'{start}{start_sub}{data}{end_sub}{end}'
-    return string
-
-
-def _filter_matches(pattern, string, preds=None):
-    """Returns iterable of matches that pass all of the predicates in `preds`.
-
-    If no predicates are provided, they default to:
-        - Match must not appear in link.
-        - Match must not appear in backticks.
+    # Most lines have no delimiters at all, which is far cheaper to rule out
+    # with substring checks than with a regex scan.
+    hits: Dict[str, List[_Span]] = {
+        delim: [] for delim in delims if delim in line}
+    if not hits:
+        return line
+    for match in _PAIRED_DELIM_RE.finditer(line):
+        delim_hits = hits.get(match.group())
+        if delim_hits is not None:
+            delim_hits.append(match.span())
+
+    code_hits = hits.pop('``', None)
+    if code_hits:
+        is_excluded = _exclusion_test(line, _link_spans)
+        code_subs = [(span, '`') for span in _balanced(code_hits, is_excluded)]
+        if code_subs:
+            line = _join_subs(line, code_subs)
+            if any(hits.values()):
+                # New code blocks may hide the remaining delimiters and shift
+                # their positions, so they have to be located in the new line.
+                return _sub_paired_delims(line, delims=tuple(hits))
+
+    # Lines made only of dashes are separators rather than strikethroughs.
+    if line.count('-') == len(line):
+        hits.pop('--', None)
+    if not any(hits.values()):
+        return line
+    is_excluded = _exclusion_test(line, _link_url_and_backtick_spans)
+    subs = sorted(
+        (span, _PAIRED_DELIM_SUBS[delim])
+        for delim, delim_hits in hits.items()
+        for span in _balanced(delim_hits, is_excluded))
+    return _join_subs(line, subs)
+
+
+def _balanced(spans: List[_Span], is_excluded: _SpanTest) -> List[_Span]:
+    """Returns the non-excluded spans which can be paired with one another."""
+    spans = [span for span in spans if not is_excluded(span)]
+    return spans[:len(spans) - len(spans) % 2]
+
+
+def _join_subs(string: str, subs: Sequence[Tuple[_Span, str]]) -> str:
+    """Returns string with each (span, sub) in sorted subs replaced by sub."""
+    if not subs:
+        return string
+    pieces = []
+    i = 0
+    for (lo, hi), sub in subs:
+        pieces.append(string[i:lo])
+        pieces.append(sub)
+        i = hi
+    pieces.append(string[i:])
+    return ''.join(pieces)
+
+
+def _filter_matches(pattern: Pattern[str], string: str) -> Iterator[Match[str]]:
+    """Returns iterable of matches which are not in links or backticks."""
+    is_excluded = _exclusion_test(string, _link_url_and_backtick_spans)
+    return (m for m in pattern.finditer(string) if not is_excluded(m.span()))
+
+
+def _exclusion_test(string: str, get_spans: _SpanGetter) -> _SpanTest:
+    """Returns a predicate telling whether a span touches any excluded span.
+
+    Excluded spans are computed once for the whole string; each candidate span
+    is then checked against them with a binary search rather than a rescan.
+
+    Args:
+        string: string which the candidate spans come from.
+        get_spans: returns the excluded spans of a string, which must be
+            non-overlapping and in order.
     """
-    if preds is None:
-        preds = (_not_in_link, _not_in_backticks)
-    return (m for m in re.finditer(pattern, string) if all(p(m) for p in preds))
+    spans = get_spans(string)
+    starts = [lo for lo, unused_hi in spans]
+    ends = [hi for unused_lo, hi in spans]
+
+    def _is_excluded(span: _Span) -> bool:
+        lo, hi = span
+        # Only the last excluded span starting before the end of the candidate
+        # can reach into it, since excluded spans never overlap.
+        k = bisect.bisect_right(starts, hi)
+        return k > 0 and ends[k - 1] >= lo
 
+    return _is_excluded
 
-def _not_in_link(match):
-    links = re.finditer(r'\[([^\]]*?) ""(.*?)""\]', match.string)
-    return not any(_spans_intersect(match.span(), m.span(2)) for m in links)
 
+def _link_spans(string: str) -> List[_Span]:
+    """Returns the spans of every link url found in the string."""
+    return [m.span(2) for m in _LINK_RE.finditer(string)]
 
-def _not_in_backticks(match):
-    backticks = re.finditer(r'`.*?`', match.string)
-    return not any(_spans_intersect(match.span(), m.span()) for m in backticks)
 
+def _link_url_and_backtick_spans(string: str) -> List[_Span]:
+    """Returns the spans of every link url and back-ticked section found.
 
-def _spans_intersect(span1, span2):
-    (lo1, hi1), (lo2, hi2) = sorted(span1), sorted(span2)
-    return hi1 >= lo2 and hi2 >= lo1
+    Both are found by a single scan of the string; of a link, only its url is
+    excluded while back-ticked sections are excluded in their entirety. The
+    scan consumes a whole link at once, so back-ticked sections within a
+    link's text are looked up separately and come before its url's span.
+    """
+    spans = []
+    for match in _EXCLUDED_RE.finditer(string):
+        if match.start('url') == -1:
+            spans.append(match.span())
+            continue
+        if '`' in match.group('text'):
+            spans.extend(
+                m.span() for m in _BACKTICK_RE.finditer(
+                    string, match.start('text'), match.end('text')))
+        spans.append(match.span('url'))
+    return spans
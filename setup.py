@@ -1,6 +1,24 @@
 """Setup for rn2md package."""
+import os
+
 from setuptools import setup, find_packages
 
+if os.environ.get('RN2MD_USE_MYPYC') == '1':
+    # Compiles the formatters into a C extension; the pure-Python module is
+    # still packaged so it is used wherever the extension is unavailable.
+    # mypyc must already be installed in the building environment, so pip
+    # needs --no-build-isolation to see it.
+    try:
+        from mypyc.build import mypycify
+    except ImportError:
+        raise SystemExit(
+            'RN2MD_USE_MYPYC=1 requires mypyc in the build environment: '
+            'install mypy[mypyc], then build with '
+            '`pip install --no-build-isolation .`') from None
+    EXT_MODULES = mypycify(['rn2md/formatters.py'])
+else:
+    EXT_MODULES = []
+
 setup(
     name='rn2md',
     version='0.1.0',
@@ -14,6 +32,10 @@ setup(
     packages=find_packages(exclude=('tests',)),
     python_requires=">=3.6",
     install_requires=open('requirements.txt').read().strip().split(),
+    extras_require={
+        'test': open('requirements-test.txt').read().strip().split(),
+    },
+    ext_modules=EXT_MODULES,
     entry_points={
         'console_scripts': [
             'rn2md=rn2md.__main__:main',
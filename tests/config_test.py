@@ -36,6 +36,15 @@ class OptionsTest(fake_filesystem_unittest.TestCase):
         options, unused_remaining_argv = config.Options.from_argv([])
         self.assertTrue(options.workdays_only)
 
+    def test_invalid_work_options_raise(self):
+        """Tests an invalid workday mode is reported when options are built."""
+        self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
+        [DEFAULT]
+        workday mode=sometimes
+        """)
+        with self.assertRaises(ValueError):
+            config.Options()
+
     def test_change_data_path(self):
         """Test data path changes made in the config file."""
         self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
@@ -45,6 +54,70 @@ class OptionsTest(fake_filesystem_unittest.TestCase):
         options, unused_remaining_argv = config.Options.from_argv([])
         self.assertEqual(options.data_path, '/test')
 
+    def test_section_overrides_defaults(self):
+        """Test a section's values take priority over the DEFAULT section."""
+        self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
+        [work]
+        workday mode=on
+
+        [DEFAULT]
+        data path=/test
+        workday mode=off
+        """)
+        options = config.Options(section='work')
+        self.assertTrue(options.workdays_only)
+        self.assertEqual(options.data_path, '/test')
+
+    def test_colon_separated_values(self):
+        """Test values may also be separated from their keys with a colon."""
+        self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
+        [DEFAULT]
+        data path: /test
+        workday mode: on
+        """)
+        options, unused_remaining_argv = config.Options.from_argv([])
+        self.assertEqual(options.data_path, '/test')
+        self.assertTrue(options.workdays_only)
+
+    def test_comments_are_ignored(self):
+        """Test comment lines in the config file are skipped."""
+        self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
+        [DEFAULT]
+        # data path=/commented
+        ; workday mode=on
+        data path=/test
+        """)
+        options, unused_remaining_argv = config.Options.from_argv([])
+        self.assertEqual(options.data_path, '/test')
+        self.assertFalse(options.workdays_only)
+
+    def test_unreadable_config_is_ignored(self):
+        """Test a config path which cannot be read falls back to defaults."""
+        self.fs.create_dir(os.path.expanduser('~/.rn2mdrc'))
+        options, unused_remaining_argv = config.Options.from_argv([])
+        self.assertEqual(options.data_path,
+                         os.path.expanduser('~/.rednotebook/data'))
+
+    def test_values_before_section_header_raise(self):
+        """Test values must appear after a section header."""
+        self.fs.create_file(os.path.expanduser('~/.rn2mdrc'), contents="""
+        data path=/test
+        [DEFAULT]
+        """)
+        with self.assertRaises(ValueError):
+            config.Options.from_argv([])
+
+    def test_unparseable_lines_raise(self):
+        """Test lines without a key/value separator are reported."""
+        for contents in ('[DEFAULT]\nworkday mode on\n',
+                         '[DEFAULT]\ndata path=/a\n  /b\n'):
+            with self.subTest(contents=contents):
+                self.fs.create_file(os.path.expanduser('~/.rn2mdrc'),
+                                    contents=contents)
+                with self.assertRaises(ValueError):
+                    config.Options.from_argv([])
+                self.fs.remove_object(os.path.expanduser('~/.rn2mdrc'))
+
     @freezegun.freeze_time(util.strict_parse_date('Mon Mar 26, 2018'))
     def test_change_default_date_range(self):
         """Test default date range changes made in the config file."""
@@ -1,4 +1,5 @@
 """Test cases for the rn2md.formatters module."""
+import functools
 import unittest
 
 from rn2md import formatters
@@ -6,16 +7,75 @@ from rn2md import formatters
 
 def apply_formatter(formatter, lines):
     """Returns given formatter's application on the given lines."""
-    return [formatter.send(line) for line in lines]
+    return [formatter(line) for line in lines]
 
 
 class RednotebookToMarkdownFormatterTest(unittest.TestCase):
     """Test formatting RedNotebook-style data to markdown-style."""
 
-    def test_constructor(self):
-        """Basic test to ensure construction works."""
-        with self.subTest():
-            _ = formatters.format_rednotebook_as_markdown()
+    def test_common_format(self):
+        """Tests formatters are applied together to every line."""
+        formatter = functools.partial(
+            formatters.format_rednotebook_as_markdown,
+            list_formatter=formatters.ListFormatter())
+        self.assertEqual(
+            apply_formatter(formatter, [
+                '=Title=',
+                '+ //first// item',
+                '+ see [docs ""http://site.com/some_page""]',
+            ]), [
+                '# Title',
+                '1. _first_ item',
+                '2. see [docs](http://site.com/some_page)',
+            ])
+
+
+class DocumentFormatterTest(unittest.TestCase):
+    """Test formatting whole RedNotebook-style entries to markdown-style."""
+
+    def test_common_format(self):
+        """Tests every line of the document is formatted."""
+        self.assertEqual(
+            formatters.format_document('\n'.join([
+                '=Title=',
+                '+ //first// item',
+                '+ see [docs ""http://site.com/some_page""]',
+            ])), '\n'.join([
+                '# Title',
+                '1. _first_ item',
+                '2. see [docs](http://site.com/some_page)',
+            ]))
+
+    def test_base_level_is_respected(self):
+        """Tests changes to header padding."""
+        self.assertEqual(
+            formatters.format_document('==A==\ntext\n=B=', header_padding=1),
+            '### A\ntext\n## B')
+
+    def test_links_do_not_span_lines(self):
+        """Tests link syntax is only recognized within a single line."""
+        self.assertEqual(
+            formatters.format_document('[split\nlink ""url""]'),
+            '[split\nlink ""url""]')
+
+
+class StreamFormatterTest(unittest.TestCase):
+    """Test lazily formatting RedNotebook-style lines to markdown-style."""
+
+    def test_line_endings_are_kept(self):
+        """Tests only newlines are split off, and are re-appended as given."""
+        self.assertEqual(
+            list(formatters.format_stream(iter([
+                '+ //A//\r\n',
+                '\n',
+                '+ B  \n',
+                '+ C',
+            ]))), [
+                '1. _A_\r\n',
+                '\n',
+                '2. B  \n',
+                '3. C',
+            ])
 
 
 class ItalicFormatterTest(unittest.TestCase):
@@ -23,28 +83,28 @@ class ItalicFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Test expected usage"""
-        formatter = formatters.format_italic_text()
+        formatter = formatters.format_italic_text
         self.assertEqual(
             apply_formatter(formatter, ['Text with //italicized// content.']),
             ['Text with _italicized_ content.'])
 
     def test_ignores_non_paired_markers(self):
         """Tests solitary markers are left alone."""
-        formatter = formatters.format_italic_text()
+        formatter = formatters.format_italic_text
         self.assertEqual(
             apply_formatter(formatter, ['//italic1//, //italic2//, unused //']),
             ['_italic1_, _italic2_, unused //'])
 
     def test_ignores_urls(self):
         """Tests that URL strings do not have their dashes changed."""
-        formatter = formatters.format_italic_text()
+        formatter = formatters.format_italic_text
         self.assertEqual(
             apply_formatter(formatter, ['http://github.com/brianrodri']),
             ['http://github.com/brianrodri'])
 
     def test_ignores_backticked_data(self):
         """Tests that back-ticked data do not get changed."""
-        formatter = formatters.format_italic_text()
+        formatter = formatters.format_italic_text
         self.assertEqual(
             apply_formatter(formatter, ['//italic//, `//escaped italic//`']),
             ['_italic_, `//escaped italic//`'])
@@ -55,7 +115,7 @@ class LinkFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_links()
+        formatter = formatters.format_links
         self.assertEqual(
             apply_formatter(formatter, ['[sample text ""go/somewhere""]']),
             ['[sample text](go/somewhere)'])
@@ -66,7 +126,7 @@ class ImageFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_images()
+        formatter = formatters.format_images
         self.assertEqual(
             apply_formatter(formatter, ['[""http://www.site.com/image.jpg""]']),
             ['![](http://www.site.com/image.jpg)'])
@@ -77,20 +137,20 @@ class StrikethroughFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(apply_formatter(formatter, ['--text--']),
                          ['~text~'])
 
     def test_punctuation_gets_stripped(self):
         """Tests punctuation is removed from parenthesized text."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(
             apply_formatter(formatter, ['--a complete sentence.--']),
             ['~a complete sentence.~'])
 
     def test_ignores_non_paired_markers(self):
         """Tests solitary markers are left alone."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(
             apply_formatter(formatter, [
                 '--changed--, --this too--, not here--or here.',
@@ -100,21 +160,21 @@ class StrikethroughFormatterTest(unittest.TestCase):
 
     def test_ignores_urls(self):
         """Tests urls are not changed."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(
             apply_formatter(formatter, ['[x ""http://do/some--weird--text""]']),
             ['[x ""http://do/some--weird--text""]'])
 
     def test_ignores_backticked_data(self):
         """Tests backticked data is left alone."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(
             apply_formatter(formatter, ['--hit--, `--not hit--`']),
             ['~hit~, `--not hit--`'])
 
     def test_ignores_lines_with_only_backticks(self):
         """Tests that data with only backticks are not changed."""
-        formatter = formatters.format_strikethrough_text()
+        formatter = formatters.format_strikethrough_text
         self.assertEqual(apply_formatter(formatter, ['-----']), ['-----'])
 
 
@@ -123,33 +183,33 @@ class HeaderFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_headers()
+        formatter = formatters.format_headers
         self.assertEqual(
             apply_formatter(formatter, ['=Level One=', '===Level Three===']),
             ['# Level One', '### Level Three'])
 
     def test_base_level_is_respected(self):
         """Tests changes to init level."""
-        formatter = formatters.format_headers(padding=2)
+        formatter = functools.partial(formatters.format_headers, padding=2)
         self.assertEqual(apply_formatter(formatter, ['===Only 3===']),
                          ['##### Only 3'])
 
     def test_inner_markers_are_ignored(self):
         """Tests header markings are only interpreted when surrounding line."""
-        formatter = formatters.format_headers()
+        formatter = formatters.format_headers
         self.assertEqual(
             apply_formatter(formatter, ['Not at =start= of text']),
             ['Not at =start= of text'])
 
     def test_only_markers_are_ignored(self):
         """Tests lines with only markers aren't affected."""
-        formatter = formatters.format_headers()
+        formatter = formatters.format_headers
         self.assertEqual(apply_formatter(formatter, ['=' * 6]), ['=' * 6])
         self.assertEqual(apply_formatter(formatter, ['=' * 7]), ['=' * 7])
 
     def test_un_balanced_markers_are_ignored(self):
         """Tests that lines must use balanced markers."""
-        formatter = formatters.format_headers()
+        formatter = formatters.format_headers
         self.assertEqual(apply_formatter(formatter, ['==Unbalanced===']),
                          ['==Unbalanced==='])
 
@@ -159,7 +219,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_unordered_list(self):
         """Tests expected usage for unordered lists."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '- A',
@@ -173,7 +233,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_ordered_list(self):
         """Tests expected usage for ordered lists."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '+ A',
@@ -187,7 +247,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_two_blank_lines_reset_numbering(self):
         """Tests two blank lines starts separate ordered lists."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '+ A',
@@ -205,7 +265,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_content_between_ordered_list_resets_numbering(self):
         """Tests content between ordered lists restarts numbering."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '+ A',
@@ -221,7 +281,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_nested_levels_are_reset_once_passed(self):
         """Tests that nested levels are respected."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '+ A',
@@ -243,7 +303,7 @@ class ListFormatterTest(unittest.TestCase):
 
     def test_nested_levels_are_not_interrupted_by_unordered_lists(self):
         """Tests that unordered lists do not restart ordered list numbering."""
-        formatter = formatters.format_lists()
+        formatter = formatters.ListFormatter().format
         self.assertEqual(
             apply_formatter(formatter, [
                 '+ A',
@@ -261,21 +321,21 @@ class InnerUnderscoreFormatterTest(unittest.TestCase):
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_inner_underscores()
+        formatter = formatters.format_inner_underscores
         self.assertEqual(
             apply_formatter(formatter, ['underscore_delimited_word']),
             [r'underscore\_delimited\_word'])
 
     def test_trailing_underscores_ignored(self):
         """Tests trailing underscores are left alone."""
-        formatter = formatters.format_inner_underscores()
+        formatter = formatters.format_inner_underscores
         self.assertEqual(
             apply_formatter(formatter, [r'_with_trailing_underscores_']),
             [r'_with\_trailing\_underscores_'])
 
     def test_ignores_urls(self):
         """Tests that underscores in urls are left alone."""
-        formatter = formatters.format_inner_underscores()
+        formatter = formatters.format_inner_underscores
         self.assertEqual(
             apply_formatter(formatter, [
                 '[test_thing ""http://github.com/test_thing""]',
@@ -285,25 +345,37 @@ class InnerUnderscoreFormatterTest(unittest.TestCase):
 
     def test_ignores_backticked_data(self):
         """Tests that underscores between backticks are left alone."""
-        formatter = formatters.format_inner_underscores()
+        formatter = formatters.format_inner_underscores
         self.assertEqual(
             apply_formatter(formatter, ['gets_escaped, `no_escape`']),
             [r'gets\_escaped, `no_escape`'])
 
+    def test_ignores_backticked_data_in_link_text(self):
+        """Tests that underscores between backticks in links are left alone."""
+        formatter = formatters.format_inner_underscores
+        self.assertEqual(
+            apply_formatter(formatter, [
+                '[`snake_case` ""url""]',
+                'see [the `foo_bar` helper ""http://x/foo_bar""]',
+            ]), [
+                '[`snake_case` ""url""]',
+                'see [the `foo_bar` helper ""http://x/foo_bar""]',
+            ])
+
 
 class CodeBlockFormatterTest(unittest.TestCase):
     """Test formatting Rednotebook-style code blocks to markdown-style."""
 
     def test_common_format(self):
         """Tests expected usage."""
-        formatter = formatters.format_code_blocks()
+        formatter = formatters.format_code_blocks
         self.assertEqual(
             apply_formatter(formatter, ['``code encoded stuff``']),
             ['`code encoded stuff`'])
 
     def test_only_two_backticks_are_formated(self):
         """Tests that multi-line code blocks are left alone."""
-        formatter = formatters.format_code_blocks()
+        formatter = formatters.format_code_blocks
         self.assertEqual(
             apply_formatter(formatter, [
                 '```py',
@@ -316,5 +388,32 @@ class CodeBlockFormatterTest(unittest.TestCase):
             ])
 
 
+class CombinedDelimiterFormatterTest(unittest.TestCase):
+    """Test code blocks, italics and strikethroughs formatted together."""
+
+    def setUp(self):
+        self.formatter = functools.partial(
+            formatters.format_rednotebook_as_markdown,
+            list_formatter=formatters.ListFormatter())
+
+    def test_code_blocks_hide_other_delimiters(self):
+        """Tests delimiters inside new code blocks are left alone."""
+        self.assertEqual(
+            apply_formatter(self.formatter, ['``a//b//`` //c//']),
+            ['`a//b//` _c_'])
+
+    def test_delimiters_after_code_blocks_are_formatted(self):
+        """Tests delimiters shifted by new code blocks are still formatted."""
+        self.assertEqual(
+            apply_formatter(self.formatter, ['``x`` --y--']),
+            ['`x` ~y~'])
+
+    def test_only_code_blocks(self):
+        """Tests lines with only code blocks need nothing else formatted."""
+        self.assertEqual(
+            apply_formatter(self.formatter, ['``code``', '``a`` ``b']),
+            ['`code`', '`a` ``b'])
+
+
 if __name__ == '__main__':
     unittest.main()